@@ -0,0 +1,714 @@
+"""
+Command-line entry point for probgen.
+
+Only the standard library is imported at module level. Provider SDKs and
+pydantic models are imported inside the subcommand that needs them, so
+`probgen --help` and no-op runs (e.g. a fully resumed `probgen verify`)
+start quickly.
+"""
+
+import argparse
+
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from probgen.constants import (
+    CLAUDE_OPUS_4,
+    CLAUDE_SONNET_4,
+    DEFAULT_CHARS_PER_TOKEN,
+    DEFAULT_TOKEN_COUNT_CACHE_PATH,
+    GPT_4O_MINI,
+    O3,
+    OPENAI_SUPPORTED_MODELS,
+)
+
+SUBDOMAINS = ["alloys", "batteries", "semiconductors", "superconductors"]
+MODIFY_FEASIBILITY_OUTPUT_ROOT = Path("prompts/modify-feasibility")
+VERIFY_CLAIM_AND_EXPLANATION_OUTPUT_ROOT = Path("prompts/verify-claim-and-explanation")
+MODIFY_FEASIBILITY_RESULTS_ROOT = Path("results/modify-feasibility")
+
+
+def build_modify_feasibility_prompts(args: argparse.Namespace) -> None:
+    from probgen.constants import (
+        GOLD_STANDARD_ALLOYS_PATH,
+        GOLD_STANDARD_BATTERIES_PATH,
+        GOLD_STANDARD_SEMICONDUCTORS_PATH,
+        GOLD_STANDARD_SUPERCONDUCTORS_PATH,
+    )
+    from probgen.prompt.modify_feasibility import construct_modify_feasibility_prompts
+    from probgen.utils import write_prompts
+
+    for subdomain, problems_path in {
+        "alloys": GOLD_STANDARD_ALLOYS_PATH,
+        "batteries": GOLD_STANDARD_BATTERIES_PATH,
+        "semiconductors": GOLD_STANDARD_SEMICONDUCTORS_PATH,
+        "superconductors": GOLD_STANDARD_SUPERCONDUCTORS_PATH,
+    }.items():
+        prompts = construct_modify_feasibility_prompts(problems_path)
+        write_prompts(prompts, args.output_root, subdomain)
+
+
+def build_verify_claim_and_explanation_prompts(args: argparse.Namespace) -> None:
+    from probgen.prompt.verify_claim_and_explanation import (
+        construct_verify_claim_and_explanation_prompts,
+    )
+    from probgen.utils import write_prompts
+
+    prompts = construct_verify_claim_and_explanation_prompts(
+        args.input_path, jsonl=args.jsonl
+    )
+    write_prompts(prompts, args.output_root, args.subdomain)
+
+
+def stream_prompts(
+    prompt_files: List[str], output_file: Path, resume: bool
+) -> Optional[Tuple[Iterator[Dict[str, Any]], int]]:
+    """
+    Stream the prompts in `prompt_files` (files, directories or globs), skipping those
+    already in `output_file` if `resume` is set.
+
+    Returns:
+        The prompts and the expected number of them, or None if there are none left.
+    """
+    from itertools import chain
+
+    from probgen.utils import (
+        count_lines,
+        count_unseen_lines,
+        expand_jsonl_paths,
+        iter_prompts,
+        load_seen_instance_ids,
+    )
+
+    paths = expand_jsonl_paths(prompt_files)
+    seen_examples = set()
+    if resume:
+        if not output_file.exists():
+            print(f"Output file {output_file} does not exist. Skipping resume.")
+        else:
+            seen_examples = load_seen_instance_ids(output_file)
+    if seen_examples:
+        # the output file may also hold responses to prompts from other files, so
+        # only count the seen examples that are in these prompt files
+        total, skipped = count_unseen_lines(paths, seen_examples)
+        print(f"Skipping {skipped} examples already present in {output_file}.")
+    else:
+        total = count_lines(paths)
+    print(f"Found {total} examples to prompt in {len(paths)} file(s).")
+
+    examples = iter_prompts(paths, skip_ids=seen_examples)
+    first = next(examples, None)
+    if first is None:
+        print("Nothing to do.")
+        return None
+    return chain([first], examples), total
+
+
+def prompt(args: argparse.Namespace) -> None:
+    stream = stream_prompts(args.prompt_files, args.output_file, args.resume)
+    if stream is None:
+        return
+
+    import asyncio
+
+    from probgen.clients.anthropic_client import DEFAULT_MODEL, OPUS, prompt_all
+
+    prompts, total = stream
+    model = OPUS if args.opus else DEFAULT_MODEL
+    asyncio.run(prompt_all(prompts, args.output_file, model=model, total=total))
+
+
+def postprocess(args: argparse.Namespace) -> None:
+    from probgen.postprocess import modify_feasibility
+
+    # Ensure output directory exists
+    args.output_dir.mkdir(parents=True, exist_ok=True)
+
+    modify_feasibility.postprocess(
+        args.input_file,
+        args.output_dir,
+        args.output_file_prefix,
+        args.subdomain,
+        args.domain,
+        args.author,
+    )
+
+
+def verify(args: argparse.Namespace) -> None:
+    stream = stream_prompts(args.prompt_files, args.output_file, args.resume)
+    if stream is None:
+        return
+
+    from probgen.clients.openai_client import prompt_all
+
+    examples, total = stream
+    prompt_all(
+        examples,
+        args.output_file,
+        model=args.model,
+        max_tokens=args.max_tokens,
+        temperature=args.temperature,
+        batch_size=args.batch_size,
+        seed=args.seed,
+        total=total,
+    )
+
+
+def export_results(args: argparse.Namespace) -> None:
+    from probgen.results.export import flatten_results, save_results_table
+
+    table = flatten_results(args.raw, args.processed, args.verification)
+    save_results_table(table, args.output_file)
+    print(f"Wrote {len(table['instance_id'])} rows to {args.output_file}.")
+
+
+def analyze(args: argparse.Namespace) -> None:
+    from probgen.results.analytics import (
+        SCORES,
+        agreement_by,
+        confusion_matrix,
+        format_confusion_matrix,
+        score_distribution_by,
+    )
+    from probgen.results.export import load_results_table
+
+    table = load_results_table(args.table)
+
+    def label(group: str) -> str:
+        # rows without a verification (or generation) record have an empty model
+        return group or "(none)"
+
+    print(f"Confusion matrix ({args.expected} x {args.observed}):")
+    print(
+        format_confusion_matrix(
+            confusion_matrix(table[args.expected], table[args.observed])
+        )
+    )
+    for by in args.by:
+        print(f"\nAgreement by {by}:")
+        for group, stats in agreement_by(
+            table, by, expected=args.expected, observed=args.observed
+        ).items():
+            print(
+                f"  {label(group)}: n={stats['n']} agreement={stats['agreement']:.3f} "
+                f"within_one={stats['within_one']:.3f}"
+            )
+        print(
+            f"\n{args.expected} distribution by {by} ({', '.join(map(str, SCORES))}):"
+        )
+        for group, counts in zip(*score_distribution_by(table, by, args.expected)):
+            print(f"  {label(group)}: {' '.join(map(str, counts))}")
+
+
+def lookup(args: argparse.Namespace) -> None:
+    import sys
+
+    from probgen.jsonl_index import JsonlReader
+
+    with JsonlReader(args.path) as reader:
+        for instance_id in args.instance_ids:
+            if instance_id not in reader:
+                print(
+                    f"Instance {instance_id} not found in {args.path}.", file=sys.stderr
+                )
+                continue
+            for record in reader.records_bytes(instance_id):
+                sys.stdout.write(record.decode("utf-8"))
+
+
+def join(args: argparse.Namespace) -> None:
+    import json
+
+    from probgen import jsonl_index
+    from probgen.utils import source_id_from_instance_id
+
+    key = source_id_from_instance_id if args.by_source else (lambda i: i)
+    with (
+        jsonl_index.JsonlReader(args.left) as left,
+        jsonl_index.JsonlReader(args.right) as right,
+    ):
+        for instance_id, left_record, right_record in jsonl_index.join(
+            left, right, key=key
+        ):
+            print(
+                json.dumps(
+                    {
+                        "instance_id": instance_id,
+                        "left": left_record,
+                        "right": right_record,
+                    }
+                )
+            )
+
+
+def plan(args: argparse.Namespace) -> None:
+    from probgen import planner
+    from probgen.utils import expand_jsonl_paths, iter_jsonl, iter_prompts
+
+    paths = expand_jsonl_paths(args.prompt_files)
+    if args.order_output is not None:
+        # a previous --order-output file matched by a glob would be truncated below
+        # while it is still being read from
+        order_output = args.order_output.resolve()
+        if any(p.resolve() == order_output for p in paths):
+            print(f"Ignoring {args.order_output}, which is the --order-output file.")
+            paths = [p for p in paths if p.resolve() != order_output]
+        if not paths:
+            raise ValueError("No prompt files other than the --order-output file.")
+    counter = planner.TokenCounter(cache_path=None if args.no_cache else args.cache)
+    chars_per_token, source = args.chars_per_token, "--chars-per-token"
+    if chars_per_token is None:
+        calibrate_from = args.calibrate_from or args.output_from
+        if calibrate_from is not None:
+            chars_per_token, n = planner.calibrate_chars_per_token(
+                r for p in expand_jsonl_paths(calibrate_from) for r in iter_jsonl(p)
+            )
+            source = f"fit on the token usage of {n} previous results"
+    if chars_per_token is None:
+        chars_per_token = planner.calibrate_chars_per_token_with_tiktoken(
+            iter_prompts(paths), counter
+        )
+        source = f"fit on {planner.CALIBRATION_ENCODING} counts of these prompts"
+    if chars_per_token is None:
+        chars_per_token, source = DEFAULT_CHARS_PER_TOKEN, "default, uncalibrated"
+    counter.chars_per_token = chars_per_token
+    print(
+        f"Estimating tokens at {chars_per_token:.2f} characters per token ({source})."
+    )
+    token_counts = {}
+    output_tokens_per_request = {}
+    for model in args.models:
+        token_counts[model] = planner.count_prompt_tokens(
+            iter_prompts(paths), model, counter
+        )
+        output_tokens = None
+        if args.output_from is not None:
+            output_tokens = planner.mean_response_tokens(
+                (
+                    r
+                    for p in expand_jsonl_paths(args.output_from)
+                    for r in iter_jsonl(p)
+                ),
+                model,
+                counter,
+            )
+            if output_tokens is None:
+                print(
+                    f"No results from {model} in --output-from; assuming "
+                    f"{args.output_tokens:g} output tokens per request."
+                )
+        if output_tokens is None:
+            output_tokens = args.output_tokens
+        output_tokens_per_request[model] = output_tokens
+        projection = planner.project_run(
+            [tokens for _, tokens in token_counts[model]],
+            output_tokens,
+            model,
+            rpm=args.rpm,
+            input_tpm=args.input_tpm,
+            output_tpm=args.output_tpm,
+        )
+        cost = projection["cost_usd"]
+        duration = projection["duration_minutes"]
+        print(
+            f"{model} ({counter.tokenizer_name(model)}): "
+            f"{projection['requests']} requests, "
+            f"{projection['input_tokens']} input tokens, "
+            f"~{projection['output_tokens']} output tokens, "
+            f"cost {'unknown' if cost is None else f'${cost:.2f}'}, "
+            + (
+                "duration unknown (no rate limits given)"
+                if duration is None
+                else f"~{duration:.1f} min (limited by {projection['limited_by']})"
+            )
+        )
+    counter.save()
+
+    instance_ids = [instance_id for instance_id, _ in token_counts[args.models[0]]]
+    duplicates = len(instance_ids) - len(set(instance_ids))
+    if duplicates:
+        print(
+            f"Warning: {duplicates} prompts share an instance ID with an earlier prompt. "
+            "They are counted above, but --order-output keeps only the last prompt for "
+            "each ID."
+        )
+
+    if args.order_output is not None:
+        import os
+        import tempfile
+
+        from probgen.jsonl_index import JsonlReader
+
+        model = args.models[0]
+        windows = planner.pack_windows(
+            dict(token_counts[model]),
+            args.input_tpm,
+            rpm=args.rpm,
+            output_tokens_per_request=output_tokens_per_request[model],
+            output_tpm=args.output_tpm,
+        )
+        with (
+            JsonlReader(paths) as reader,
+            tempfile.NamedTemporaryFile(
+                "wb",
+                dir=args.order_output.parent,
+                prefix=args.order_output.name,
+                suffix=".tmp",
+                delete=False,
+            ) as f,
+        ):
+            try:
+                for window in windows:
+                    for instance_id in window:
+                        f.write(reader.get_bytes(instance_id))
+            except BaseException:
+                f.close()
+                os.unlink(f.name)
+                raise
+        os.replace(f.name, args.order_output)
+        print(
+            f"Wrote {sum(map(len, windows))} prompts in {len(windows)} one-minute "
+            f"windows to {args.order_output}."
+        )
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="probgen", description="Automated generation of SciFy problems."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    # build-prompts
+    build_prompts_parser = subparsers.add_parser(
+        "build-prompts", help="Build prompt files."
+    )
+    build_subparsers = build_prompts_parser.add_subparsers(dest="task", required=True)
+
+    modify_parser = build_subparsers.add_parser(
+        "modify-feasibility",
+        help="Build modify feasibility prompts from the gold standard problems.",
+    )
+    modify_parser.add_argument(
+        "--output-root",
+        type=Path,
+        default=MODIFY_FEASIBILITY_OUTPUT_ROOT,
+        help=f"Root directory for the prompt files (default: {MODIFY_FEASIBILITY_OUTPUT_ROOT})",
+    )
+    modify_parser.set_defaults(func=build_modify_feasibility_prompts)
+
+    verify_build_parser = build_subparsers.add_parser(
+        "verify-claim-and-explanation",
+        help="Build verify claim and explanation prompts.",
+    )
+    verify_build_parser.add_argument(
+        "input_path",
+        type=Path,
+        help="Path to the directory containing gold standard problems.",
+    )
+    verify_build_parser.add_argument(
+        "subdomain",
+        type=str,
+        choices=SUBDOMAINS,
+        help="Subdomain for which to build prompts.",
+    )
+    verify_build_parser.add_argument(
+        "--jsonl",
+        action="store_true",
+        help="If set, treats the input files as JSONL files instead of JSON.",
+    )
+    verify_build_parser.add_argument(
+        "--output-root",
+        type=Path,
+        default=VERIFY_CLAIM_AND_EXPLANATION_OUTPUT_ROOT,
+        help=f"Root directory for the prompt files (default: {VERIFY_CLAIM_AND_EXPLANATION_OUTPUT_ROOT})",
+    )
+    verify_build_parser.set_defaults(func=build_verify_claim_and_explanation_prompts)
+
+    # prompt
+    prompt_parser = subparsers.add_parser(
+        "prompt", help="Generate modified problems with Claude."
+    )
+    prompt_parser.add_argument(
+        "prompt_files",
+        type=str,
+        nargs="+",
+        help="Files, directories or glob patterns containing prompts",
+    )
+    prompt_parser.add_argument(
+        "output_file", type=Path, help="Path to the output file for responses"
+    )
+    prompt_parser.add_argument(
+        "--opus", action="store_true", help="Use Opus model instead of default"
+    )
+    prompt_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="If true, will filter out prompts that are already in output_file",
+    )
+    prompt_parser.set_defaults(func=prompt)
+
+    # postprocess
+    postprocess_parser = subparsers.add_parser(
+        "postprocess", help="Postprocess SciFy feasibility problems"
+    )
+    postprocess_parser.add_argument(
+        "input_file", type=Path, help="Input JSONL file with feasibility problems"
+    )
+    postprocess_parser.add_argument(
+        "output_dir", type=Path, help="Directory to save postprocessed files"
+    )
+    postprocess_parser.add_argument(
+        "output_file_prefix", type=str, help="Prefix for output files"
+    )
+    postprocess_parser.add_argument(
+        "subdomain", type=str, help="Subdomain for the problems"
+    )
+    postprocess_parser.add_argument(
+        "--domain",
+        type=str,
+        default="materials",
+        help="Domain of the problems (default: materials)",
+    )
+    postprocess_parser.add_argument(
+        "--author",
+        type=str,
+        default="JHU",
+        help="Author of the problems (default: JHU)",
+    )
+    postprocess_parser.set_defaults(func=postprocess)
+
+    # verify
+    verify_parser = subparsers.add_parser(
+        "verify", help="Verify claims and explanations with OpenAI models."
+    )
+    verify_parser.add_argument(
+        "prompt_files",
+        type=str,
+        nargs="+",
+        help="Files, directories or glob patterns containing prompts",
+    )
+    verify_parser.add_argument("output_file", type=Path)
+    verify_parser.add_argument(
+        "--model",
+        type=str,
+        default=GPT_4O_MINI,
+        choices=sorted(OPENAI_SUPPORTED_MODELS),
+    )
+    verify_parser.add_argument(
+        "--max-tokens",
+        type=int,
+        default=None,
+        help="Max tokens to generate (should be set to the same value as the fine-tuned models)",
+    )
+    verify_parser.add_argument(
+        "--temperature",
+        type=float,
+        default=0.0,
+        help="Sampling temperature",
+    )
+    verify_parser.add_argument(
+        "--batch-size",
+        type=int,
+        default=1,
+        help="Number of requests to issue in parallel",
+    )
+    verify_parser.add_argument(
+        "--seed",
+        type=int,
+        default=1337,
+        help="Random seed. If set to -1, will cycle through a list of seeds",
+    )
+    verify_parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="If true, will filter out prompts that are already in output_file",
+    )
+    verify_parser.set_defaults(func=verify)
+
+    # export-results
+    export_parser = subparsers.add_parser(
+        "export-results",
+        help="Flatten generation, postprocessed and verification results into a columnar table.",
+    )
+    export_parser.add_argument(
+        "output_file",
+        type=Path,
+        help="Output table (.parquet, which requires pyarrow, or .npz)",
+    )
+    export_parser.add_argument(
+        "--raw",
+        type=Path,
+        default=MODIFY_FEASIBILITY_RESULTS_ROOT / "raw",
+        help="Raw generation results (default: %(default)s)",
+    )
+    export_parser.add_argument(
+        "--processed",
+        type=Path,
+        default=MODIFY_FEASIBILITY_RESULTS_ROOT / "processed",
+        help="Postprocessed problems (default: %(default)s)",
+    )
+    export_parser.add_argument(
+        "--verification",
+        type=Path,
+        nargs="*",
+        default=[],
+        help="Verification results (files or directories)",
+    )
+    export_parser.set_defaults(func=export_results)
+
+    # analyze
+    analyze_parser = subparsers.add_parser(
+        "analyze", help="Report agreement statistics for an exported results table."
+    )
+    analyze_parser.add_argument(
+        "table", type=Path, help="Table written by `probgen export-results`"
+    )
+    analyze_parser.add_argument(
+        "--by",
+        type=str,
+        nargs="*",
+        default=["subdomain", "verifier_model"],
+        choices=["subdomain", "source_id", "generator_model", "verifier_model"],
+        help="Columns to break the statistics down by (default: %(default)s)",
+    )
+    analyze_parser.add_argument(
+        "--expected",
+        type=str,
+        default="target_score",
+        choices=["source_score", "target_score"],
+        help="Column with the expected scores (default: %(default)s)",
+    )
+    analyze_parser.add_argument(
+        "--observed",
+        type=str,
+        default="verified_score",
+        choices=["target_score", "verified_score"],
+        help="Column with the observed scores (default: %(default)s)",
+    )
+    analyze_parser.set_defaults(func=analyze)
+
+    # lookup
+    lookup_parser = subparsers.add_parser(
+        "lookup", help="Print the records for the given instance IDs."
+    )
+    lookup_parser.add_argument(
+        "path", type=Path, help="JSONL file or directory of JSONL files"
+    )
+    lookup_parser.add_argument("instance_ids", type=str, nargs="+")
+    lookup_parser.set_defaults(func=lookup)
+
+    # join
+    join_parser = subparsers.add_parser(
+        "join",
+        help="Join two sets of JSONL records by instance ID, printing one JSON object per match.",
+    )
+    join_parser.add_argument(
+        "left",
+        type=Path,
+        help="Left-hand JSONL file or directory (e.g. raw generation results)",
+    )
+    join_parser.add_argument(
+        "right",
+        type=Path,
+        help="Right-hand JSONL file or directory (e.g. verification results)",
+    )
+    join_parser.add_argument(
+        "--by-source",
+        action="store_true",
+        help="Join right-hand records on the ID of the problem they were generated from "
+        "(e.g. alloys_0001-3 -> alloys_0001)",
+    )
+    join_parser.set_defaults(func=join)
+
+    # plan
+    plan_parser = subparsers.add_parser(
+        "plan",
+        help="Project the token usage, cost and duration of prompting with a prompt set.",
+    )
+    plan_parser.add_argument(
+        "prompt_files",
+        type=str,
+        nargs="+",
+        help="Files, directories or glob patterns containing prompts",
+    )
+    plan_parser.add_argument(
+        "--models",
+        type=str,
+        nargs="+",
+        default=[CLAUDE_SONNET_4, CLAUDE_OPUS_4, GPT_4O_MINI, O3],
+        help="Models to plan for (default: %(default)s)",
+    )
+    plan_parser.add_argument("--rpm", type=int, help="Requests per minute limit")
+    plan_parser.add_argument(
+        "--input-tpm", type=int, help="Input tokens per minute limit"
+    )
+    plan_parser.add_argument(
+        "--output-tpm", type=int, help="Output tokens per minute limit"
+    )
+    output_group = plan_parser.add_mutually_exclusive_group()
+    output_group.add_argument(
+        "--output-tokens",
+        type=float,
+        default=1000,
+        help="Expected output tokens per request, including any reasoning tokens "
+        "(default: %(default)s)",
+    )
+    output_group.add_argument(
+        "--output-from",
+        type=str,
+        nargs="+",
+        help="Estimate output tokens per request from each model's responses in previous "
+        "results (files, directories or glob patterns); models without results use the "
+        "--output-tokens default",
+    )
+    plan_parser.add_argument(
+        "--chars-per-token",
+        type=float,
+        help="Characters per token for models without a local tokenizer (default: fit "
+        "on the token usage recorded in --calibrate-from or --output-from, else on "
+        f"tiktoken counts of the prompts, else {DEFAULT_CHARS_PER_TOKEN})",
+    )
+    plan_parser.add_argument(
+        "--calibrate-from",
+        type=str,
+        nargs="+",
+        help="Fit characters per token on the token usage recorded in previous results "
+        "(files, directories or glob patterns)",
+    )
+    plan_parser.add_argument(
+        "--cache",
+        type=Path,
+        default=DEFAULT_TOKEN_COUNT_CACHE_PATH,
+        help="Token count cache (default: %(default)s)",
+    )
+    plan_parser.add_argument(
+        "--no-cache", action="store_true", help="Do not read or write the cache"
+    )
+    plan_parser.add_argument(
+        "--order-output",
+        type=Path,
+        help="Write the prompts to this file, ordered to pack the rate limit windows of "
+        "the first model (requires --input-tpm)",
+    )
+    plan_parser.set_defaults(func=plan)
+
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    if args.command == "plan" and args.order_output and args.input_tpm is None:
+        parser.error("--input-tpm is required with --order-output")
+    # checked before flattening the results (see probgen.results.export.TABLE_SUFFIXES)
+    if args.command in ("export-results", "analyze"):
+        table_path = (
+            args.output_file if args.command == "export-results" else args.table
+        )
+        if table_path.suffix not in (".parquet", ".npz"):
+            parser.error(f"{table_path} must end in .parquet or .npz")
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import aiohttp
+import asyncio
+import json
+import os
+
+from tenacity import (
+    retry,
+    stop_after_attempt,
+    wait_random_exponential,
+)
+from tqdm import tqdm
+from typing import Any, Dict, Iterable, Optional
+
+from probgen.constants import GPT_4O_MINI, OPENAI_SUPPORTED_MODELS
+
+SUPPORTED_MODELS = OPENAI_SUPPORTED_MODELS
+API_KEY = os.environ.get("OPENAI_API_KEY")
+CHAT_COMPLETIONS_ENDPOINT = "https://api.openai.com/v1/chat/completions"
+headers = {"Content-Type": "application/json", "Authorization": f"Bearer {API_KEY}"}
+
+
+def prompt_all(
+    examples: Iterable[Dict[str, Any]],
+    output_file: str,
+    model: str = GPT_4O_MINI,
+    max_tokens: Optional[int] = None,
+    temperature: float = 0.0,
+    batch_size: int = 1,
+    seed: int = 1337,
+    total: Optional[int] = None,
+) -> None:
+    """
+    Prompt the model with each example, appending responses to output_file as they arrive.
+
+    Examples are consumed lazily: at most `batch_size` requests are in flight and at most
+    `batch_size` more examples are buffered, so memory use does not depend on the number
+    of examples. Responses are written in completion order.
+
+    Args:
+        examples (Iterable[Dict[str, Any]]): The examples to prompt with.
+        output_file (str): Path to the JSONL file to append responses to.
+        model (str): The model to prompt.
+        max_tokens (Optional[int]): Max tokens to generate.
+        temperature (float): Sampling temperature.
+        batch_size (int): Number of requests to issue in parallel.
+        seed (int): Random seed.
+        total (Optional[int]): Expected number of examples, for the progress bar.
+    """
+    assert model in SUPPORTED_MODELS, f"Unsupported model: {model}"
+    asyncio.run(
+        _prompt_all(
+            examples,
+            output_file,
+            model,
+            max_tokens,
+            temperature,
+            batch_size,
+            seed,
+            total,
+        )
+    )
+
+
+async def _prompt_all(
+    examples, output_file, model, max_tokens, temperature, batch_size, seed, total
+) -> None:
+    # bounded so that reading examples can't run ahead of the requests
+    queue = asyncio.Queue(maxsize=batch_size)
+
+    async def produce():
+        for e in examples:
+            await queue.put(e)
+        for _ in range(batch_size):
+            await queue.put(None)
+
+    async def consume(session, out_f, pbar):
+        while (e := await queue.get()) is not None:
+            r = await prompt(
+                session,
+                model,
+                e["user_prompt"],
+                max_tokens,
+                temperature,
+                e["system_prompt"],
+                seed,
+            )
+            o = {
+                "instance_id": e["instance_id"],
+                "user_prompt": e["user_prompt"],
+                "system_prompt": e["system_prompt"],
+                "meta": e.get("meta", {}) | {"model": model},
+                "response": r,
+            }
+            out_f.write(json.dumps(o) + "\n")
+            out_f.flush()
+            pbar.update(1)
+
+    with (
+        open(output_file, "a") as out_f,
+        tqdm(desc="Prompting...", total=total) as pbar,
+    ):
+        async with aiohttp.ClientSession() as session:
+            await asyncio.gather(
+                produce(), *(consume(session, out_f, pbar) for _ in range(batch_size))
+            )
+
+
+# retry to avoid being rate-limited
+@retry(stop=stop_after_attempt(5), wait=wait_random_exponential(min=2, max=60))
+async def prompt(
+    session: aiohttp.ClientSession,
+    model: str,
+    user_prompt: str,
+    max_tokens: int,
+    temperature: float,
+    system_prompt: str,
+    seed: int,
+) -> str:
+    # prompt the model
+    messages = [
+        {"role": "system", "content": system_prompt},
+        {"role": "user", "content": user_prompt},
+    ]
+    data = {
+        "model": model,
+        "messages": messages,
+        "max_completion_tokens": max_tokens,
+        "seed": seed,
+    }
+    # temperature supported only for non-reasoning models
+    if not model.startswith("o3") or model.startswith("o4"):
+        data["temperature"] = temperature
+
+    async with session.post(
+        CHAT_COMPLETIONS_ENDPOINT, headers=headers, json=data
+    ) as response:
+        resp = await response.json()
+        if "choices" in resp:
+            return resp["choices"][0]["message"]["content"]
+        elif "error" in resp:
+            raise RuntimeError(resp["error"])
+        else:
+            raise RuntimeError(f"Unexpected response from OpenAI API: {resp}")
@@ -29,3 +29,27 @@ GOLD_STANDARD_SEMICONDUCTORS_PATH = Path(
 GOLD_STANDARD_SUPERCONDUCTORS_PATH = Path(
     os.path.join(GOLD_STANDARD_PATH, "superconductors")
 )
+
+# Models supported by the prompting clients
+CLAUDE_SONNET_4 = "claude-sonnet-4-20250514"
+CLAUDE_OPUS_4 = "claude-opus-4-20250514"
+GPT_4O_MINI = "gpt-4o-mini-2024-07-18"
+O3 = "o3-2025-04-16"
+OPENAI_SUPPORTED_MODELS = frozenset({GPT_4O_MINI, O3})
+
+# USD per million (input, output) tokens. Output prices also apply to reasoning tokens.
+MODEL_PRICES_PER_MTOK = {
+    CLAUDE_SONNET_4: (3.0, 15.0),
+    CLAUDE_OPUS_4: (15.0, 75.0),
+    GPT_4O_MINI: (0.15, 0.6),
+    O3: (2.0, 8.0),
+}
+
+# Characters per token for models without a local tokenizer (a conservative
+# estimate for English scientific text)
+DEFAULT_CHARS_PER_TOKEN = 3.5
+DEFAULT_TOKEN_COUNT_CACHE_PATH = (
+    Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache"))
+    / "probgen"
+    / "token_counts.json"
+)
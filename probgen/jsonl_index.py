@@ -0,0 +1,252 @@
+"""
+Random access to JSONL prompt and result files by instance ID.
+
+Each file gets an index mapping instance IDs to the byte offset and length of
+their records (an instance ID can have several records, e.g. verification
+output from several models). The index is cached next to the file (`<file>.idx`) and rebuilt
+whenever the file's size or modification time changes. Records are read from
+a memory map, so looking up one record does not parse any other record.
+"""
+
+import json
+import mmap
+import os
+import tempfile
+
+from collections import OrderedDict
+from pathlib import Path
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+)
+
+from probgen.utils import instance_id_of_line, list_jsonl_files
+
+INDEX_SUFFIX = ".idx"
+# Each memory map holds a file descriptor, and prompts are stored one file per problem
+MAX_OPEN_MAPS = 16
+# Bumped whenever the format of cached indices changes
+INDEX_VERSION = 2
+
+
+def index_path_for(path: Path) -> Path:
+    """Returns the path of the cached index for a JSONL file."""
+    return path.with_name(path.name + INDEX_SUFFIX)
+
+
+def build_index(path: Path) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Builds an index mapping each instance ID in a JSONL file to the byte offset and length
+    of each of its records.
+
+    Args:
+        path (Path): Path to the JSONL file.
+
+    Returns:
+        Dict[str, List[Tuple[int, int]]]: The index, with the records of each instance ID
+            in file order.
+    """
+    index = {}
+    offset = 0
+    with open(path, "rb") as f:
+        for line in f:
+            if line.strip():
+                index.setdefault(instance_id_of_line(line), []).append(
+                    (offset, len(line))
+                )
+            offset += len(line)
+    return index
+
+
+def load_index(path: Path) -> Dict[str, List[Tuple[int, int]]]:
+    """
+    Loads the cached index for a JSONL file, (re)building and caching it if it is missing
+    or out of date.
+
+    Args:
+        path (Path): Path to the JSONL file.
+
+    Returns:
+        Dict[str, List[Tuple[int, int]]]: The index (see `build_index`).
+    """
+    stat = os.stat(path)
+    index_path = index_path_for(path)
+    try:
+        with open(index_path, "r") as f:
+            cached = json.load(f)
+        if (
+            cached["version"] == INDEX_VERSION
+            and cached["size"] == stat.st_size
+            and cached["mtime_ns"] == stat.st_mtime_ns
+        ):
+            return {
+                k: [tuple(entry) for entry in v] for k, v in cached["index"].items()
+            }
+    except (OSError, ValueError, KeyError):
+        pass
+
+    index = build_index(path)
+    try:
+        # A unique temporary file keeps concurrent writers of the same index from
+        # clobbering each other; the last os.replace wins
+        with tempfile.NamedTemporaryFile(
+            "w",
+            dir=index_path.parent,
+            prefix=index_path.name,
+            suffix=".tmp",
+            delete=False,
+        ) as f:
+            json.dump(
+                {
+                    "version": INDEX_VERSION,
+                    "size": stat.st_size,
+                    "mtime_ns": stat.st_mtime_ns,
+                    "index": index,
+                },
+                f,
+            )
+        try:
+            os.replace(f.name, index_path)
+        except OSError:
+            os.unlink(f.name)
+            raise
+    except OSError:
+        # The index is only a cache, so an unwritable directory is not an error
+        pass
+    return index
+
+
+class JsonlReader:
+    """
+    Random access to the records of one or more JSONL files by instance ID.
+
+    Only the indices are held in memory; records are parsed on access. An instance ID can
+    have several records, in one file or across files; `records` returns all of them,
+    while `reader[instance_id]` and `get` return the last one.
+
+    Example:
+        with JsonlReader(Path("results/modify-feasibility/raw")) as reader:
+            record = reader["alloys_0001"]
+    """
+
+    def __init__(
+        self, path: Union[Path, Sequence[Path]], max_open_maps: int = MAX_OPEN_MAPS
+    ):
+        """
+        Args:
+            path (Union[Path, Sequence[Path]]): A JSONL file or a directory containing
+                JSONL files, or a sequence of them (later files take precedence in
+                `get`).
+            max_open_maps (int): Maximum number of files to keep mapped at once; the least
+                recently used map is closed to make room for another.
+        """
+        paths = [path] if isinstance(path, Path) else path
+        self.files = [file for p in paths for file in list_jsonl_files(p)]
+        self.max_open_maps = max_open_maps
+        # file number -> map, least recently used first
+        self._maps: "OrderedDict[int, mmap.mmap]" = OrderedDict()
+        # instance ID -> [(file number, offset, length)], in file order
+        self._index: Dict[str, List[Tuple[int, int, int]]] = {}
+        for i, file in enumerate(self.files):
+            for instance_id, entries in load_index(file).items():
+                self._index.setdefault(instance_id, []).extend(
+                    (i, offset, length) for offset, length in entries
+                )
+
+    def _map(self, i: int) -> mmap.mmap:
+        if i in self._maps:
+            self._maps.move_to_end(i)
+            return self._maps[i]
+        while len(self._maps) >= self.max_open_maps:
+            self._maps.popitem(last=False)[1].close()
+        with open(self.files[i], "rb") as f:
+            self._maps[i] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._maps[i]
+
+    def __contains__(self, instance_id: str) -> bool:
+        return instance_id in self._index
+
+    def __len__(self) -> int:
+        return len(self._index)
+
+    def __getitem__(self, instance_id: str) -> Dict[str, Any]:
+        return json.loads(self.get_bytes(instance_id))
+
+    def ids(self) -> Iterator[str]:
+        """Iterates over the instance IDs in file order."""
+        return iter(self._index)
+
+    def get(
+        self, instance_id: str, default: Optional[Dict[str, Any]] = None
+    ) -> Optional[Dict[str, Any]]:
+        """Returns the record for an instance ID, or `default` if there is none."""
+        if instance_id not in self._index:
+            return default
+        return self[instance_id]
+
+    def get_bytes(self, instance_id: str) -> bytes:
+        """Returns the last unparsed record for an instance ID."""
+        i, offset, length = self._index[instance_id][-1]
+        return self._map(i)[offset : offset + length]
+
+    def records_bytes(self, instance_id: str) -> List[bytes]:
+        """Returns all unparsed records for an instance ID, in file order."""
+        return [
+            self._map(i)[offset : offset + length]
+            for i, offset, length in self._index[instance_id]
+        ]
+
+    def records(self, instance_id: str) -> List[Dict[str, Any]]:
+        """Returns all records for an instance ID, in file order."""
+        return [json.loads(b) for b in self.records_bytes(instance_id)]
+
+    def close(self) -> None:
+        for m in self._maps.values():
+            m.close()
+        self._maps.clear()
+
+    def __enter__(self) -> "JsonlReader":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def join(
+    left: JsonlReader,
+    right: JsonlReader,
+    key: Callable[[str], str] = lambda instance_id: instance_id,
+) -> Iterator[Tuple[str, Dict[str, Any], Dict[str, Any]]]:
+    """
+    Joins the records of two readers, one pair at a time.
+
+    Args:
+        left (JsonlReader): Reader for the left-hand records (e.g. raw generation output).
+        right (JsonlReader): Reader for the right-hand records (e.g. verification output).
+        key (Callable[[str], str]): Maps a right-hand instance ID to the left-hand instance
+            ID it joins with (e.g. `source_id_from_instance_id`). Defaults to the identity.
+
+    Yields:
+        Tuple[str, Dict[str, Any], Dict[str, Any]]: The right-hand instance ID and the
+            left-hand and right-hand records, for each pair of matching records (e.g. one
+            pair per verifier model if the right-hand side holds several).
+    """
+    # Right-hand records for the same left-hand records are usually adjacent
+    # (e.g. alloys_0001-1, ..., alloys_0001-4), so keep the last left-hand records
+    last_left_id, last_left = None, []
+    for instance_id in right.ids():
+        left_id = key(instance_id)
+        if left_id not in left:
+            continue
+        if left_id != last_left_id:
+            last_left_id, last_left = left_id, left.records(left_id)
+        for right_record in right.records(instance_id):
+            for left_record in last_left:
+                yield instance_id, left_record, right_record
@@ -0,0 +1,361 @@
+"""
+Offline planning for prompting runs.
+
+Token counts are computed locally, with tiktoken for OpenAI models when it is
+installed and its encoding is available, and with a characters-per-token
+estimate otherwise (Anthropic does not ship a local tokenizer). The estimate is
+calibrated from the token usage recorded in previous results or, failing
+that, against tiktoken. Tokenizer counts are cached by content hash, so
+re-planning an unchanged prompt set does not re-tokenize it.
+"""
+
+import bisect
+import hashlib
+import json
+import os
+import tempfile
+
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from probgen.constants import (
+    DEFAULT_CHARS_PER_TOKEN,
+    DEFAULT_TOKEN_COUNT_CACHE_PATH,
+    GPT_4O_MINI,
+    MODEL_PRICES_PER_MTOK,
+    O3,
+)
+
+TIKTOKEN_ENCODINGS = {GPT_4O_MINI: "o200k_base", O3: "o200k_base"}
+# Encoding used to calibrate the estimate when there is no recorded usage
+CALIBRATION_ENCODING = "o200k_base"
+
+
+@lru_cache(maxsize=None)
+def load_tiktoken_encoding(name: str):
+    """
+    Loads a tiktoken encoding, or returns None if tiktoken is not installed or the
+    encoding can't be loaded (tiktoken downloads encodings on first use, so this
+    happens when offline).
+    """
+    try:
+        import tiktoken
+
+        return tiktoken.get_encoding(name)
+    except Exception:
+        return None
+
+
+class TokenCounter:
+    """
+    Counts tokens for a model. Tokenizer counts are cached by a hash of the tokenizer
+    and the text; estimates are cheap enough to recompute.
+    """
+
+    def __init__(
+        self,
+        chars_per_token: float = DEFAULT_CHARS_PER_TOKEN,
+        cache_path: Optional[Path] = DEFAULT_TOKEN_COUNT_CACHE_PATH,
+    ):
+        """
+        Args:
+            chars_per_token (float): Characters per token for models without a local
+                tokenizer (see `calibrate_chars_per_token`). Can be changed after the
+                counter is created, e.g. once it has been calibrated.
+            cache_path (Optional[Path]): JSON file to cache counts in, or None to not cache.
+        """
+        self.cache_path = cache_path
+        self.chars_per_token = chars_per_token
+        self._cache: Dict[str, int] = {}
+        self._dirty = False
+        if cache_path is not None:
+            try:
+                with open(cache_path, "r") as f:
+                    cache = json.load(f)
+                if isinstance(cache, dict):
+                    self._cache = cache
+            except (OSError, ValueError):
+                # The cache is rebuilt if it is missing or corrupt
+                pass
+
+    def _encoding(self, model: str):
+        name = TIKTOKEN_ENCODINGS.get(model)
+        return None if name is None else load_tiktoken_encoding(name)
+
+    def tokenizer_name(self, model: str) -> str:
+        """Returns the name of the tokenizer used for a model."""
+        encoding = self._encoding(model)
+        if encoding is not None:
+            return f"tiktoken:{encoding.name}"
+        return f"chars_per_token:{self.chars_per_token:.2f}"
+
+    def count(self, text: str, model: str) -> int:
+        """Returns the number of tokens in `text` for `model`."""
+        encoding = self._encoding(model)
+        if encoding is None:
+            return round(len(text) / self.chars_per_token)
+        return self._count_encoded(text, encoding)
+
+    def count_with_encoding(self, text: str, encoding_name: str) -> Optional[int]:
+        """
+        Returns the number of tokens in `text` for a tiktoken encoding, or None if the
+        encoding is not available.
+        """
+        encoding = load_tiktoken_encoding(encoding_name)
+        if encoding is None:
+            return None
+        return self._count_encoded(text, encoding)
+
+    def _count_encoded(self, text: str, encoding) -> int:
+        key = hashlib.sha256(f"{encoding.name}\0{text}".encode("utf-8")).hexdigest()
+        if key not in self._cache:
+            self._cache[key] = len(encoding.encode(text, disallowed_special=()))
+            self._dirty = True
+        return self._cache[key]
+
+    def save(self) -> None:
+        """Writes new counts to the cache file, if it can be written."""
+        if self.cache_path is None or not self._dirty:
+            return
+        try:
+            self.cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with tempfile.NamedTemporaryFile(
+                "w",
+                dir=self.cache_path.parent,
+                prefix=self.cache_path.name,
+                suffix=".tmp",
+                delete=False,
+            ) as f:
+                json.dump(self._cache, f)
+            try:
+                os.replace(f.name, self.cache_path)
+            except OSError:
+                os.unlink(f.name)
+                raise
+        except OSError:
+            # The counts are only a cache, so an unwritable directory is not an error
+            return
+        self._dirty = False
+
+
+def _prompt_text(record: Dict[str, Any]) -> str:
+    return record["system_prompt"] + record["user_prompt"]
+
+
+def calibrate_chars_per_token(
+    results: Iterable[Dict[str, Any]],
+) -> Tuple[Optional[float], int]:
+    """
+    Fits characters per token from the input token usage recorded in previous results
+    (see probgen.clients.anthropic_client).
+
+    Args:
+        results (Iterable[Dict[str, Any]]): Result records. Records without a "usage"
+            field are ignored.
+
+    Returns:
+        Tuple[Optional[float], int]: The characters per token (None if no record has
+            usage) and the number of records it was fit on.
+    """
+    chars = 0
+    tokens = 0
+    n = 0
+    for r in results:
+        input_tokens = r.get("usage", {}).get("input_tokens")
+        if input_tokens:
+            chars += len(_prompt_text(r))
+            tokens += input_tokens
+            n += 1
+    return (chars / tokens if tokens else None), n
+
+
+def calibrate_chars_per_token_with_tiktoken(
+    prompts: Iterable[Dict[str, Any]], counter: TokenCounter
+) -> Optional[float]:
+    """
+    Fits characters per token against tiktoken's counts for the same prompts. This is a
+    proxy for models whose tokenizer is not available locally.
+
+    Args:
+        prompts (Iterable[Dict[str, Any]]): Prompt records (see probgen.utils.iter_prompts).
+        counter (TokenCounter): The token counter whose cache to count through.
+
+    Returns:
+        Optional[float]: The characters per token, or None if tiktoken is not available
+            or there are no prompts.
+    """
+    if load_tiktoken_encoding(CALIBRATION_ENCODING) is None:
+        return None
+    chars = 0
+    tokens = 0
+    for p in prompts:
+        # the prompts are counted in parts, as in `count_prompt_tokens`, so OpenAI
+        # models using the same encoding hit the same cache entries
+        for text in (p["system_prompt"], p["user_prompt"]):
+            chars += len(text)
+            tokens += counter.count_with_encoding(text, CALIBRATION_ENCODING)
+    return chars / tokens if tokens else None
+
+
+def count_prompt_tokens(
+    prompts: Iterable[Dict[str, Any]], model: str, counter: TokenCounter
+) -> List[Tuple[str, int]]:
+    """
+    Counts the input tokens of each prompt.
+
+    Args:
+        prompts (Iterable[Dict[str, Any]]): Prompt records (see probgen.utils.iter_prompts).
+        model (str): The model the prompts will be sent to.
+        counter (TokenCounter): The token counter to use.
+
+    Returns:
+        List[Tuple[str, int]]: The instance ID and number of input tokens of each prompt,
+            in order. Prompts that share an instance ID are all included.
+    """
+    return [
+        (
+            p["instance_id"],
+            counter.count(p["system_prompt"], model)
+            + counter.count(p["user_prompt"], model),
+        )
+        for p in prompts
+    ]
+
+
+def mean_response_tokens(
+    results: Iterable[Dict[str, Any]], model: str, counter: TokenCounter
+) -> Optional[float]:
+    """
+    Computes the mean number of tokens in the responses `model` gave in previous results,
+    for use as the expected output size of a new run. The recorded output token usage is
+    used where available; otherwise the response is counted.
+
+    Args:
+        results (Iterable[Dict[str, Any]]): Result records with a "response" field. Only
+            records whose "meta" names `model` are used.
+        model (str): The model to count tokens for.
+        counter (TokenCounter): The token counter to use.
+
+    Returns:
+        Optional[float]: The mean number of response tokens, or None if there are no
+            results from `model`.
+    """
+    total = 0
+    n = 0
+    for r in results:
+        if r.get("meta", {}).get("model") != model:
+            continue
+        output_tokens = r.get("usage", {}).get("output_tokens")
+        if output_tokens is None:
+            response = r["response"]
+            if not isinstance(response, str):
+                response = json.dumps(response, ensure_ascii=False)
+            output_tokens = counter.count(response, model)
+        total += output_tokens
+        n += 1
+    return total / n if n else None
+
+
+def project_run(
+    input_tokens: List[int],
+    output_tokens_per_request: float,
+    model: str,
+    rpm: Optional[int] = None,
+    input_tpm: Optional[int] = None,
+    output_tpm: Optional[int] = None,
+) -> Dict[str, Any]:
+    """
+    Projects the cost and duration of a run from its token counts and rate limits.
+
+    The duration is the time needed to get through the run at the most restrictive of the
+    given limits; request latency is not modeled.
+
+    Args:
+        input_tokens (List[int]): Input tokens of each request.
+        output_tokens_per_request (float): Expected output tokens of each request.
+        model (str): The model to prompt.
+        rpm (Optional[int]): Requests per minute limit.
+        input_tpm (Optional[int]): Input tokens per minute limit.
+        output_tpm (Optional[int]): Output tokens per minute limit.
+
+    Returns:
+        Dict[str, Any]: The number of requests, input and output tokens, the projected
+            cost in USD (None for models without a known price), the projected duration
+            in minutes (None if no limits are given) and the limit that determines it.
+    """
+    requests = len(input_tokens)
+    total_input = sum(input_tokens)
+    total_output = output_tokens_per_request * requests
+
+    cost = None
+    if model in MODEL_PRICES_PER_MTOK:
+        input_price, output_price = MODEL_PRICES_PER_MTOK[model]
+        cost = (total_input * input_price + total_output * output_price) / 1e6
+
+    minutes = {
+        "rpm": requests / rpm if rpm else None,
+        "input_tpm": total_input / input_tpm if input_tpm else None,
+        "output_tpm": total_output / output_tpm if output_tpm else None,
+    }
+    minutes = {k: v for k, v in minutes.items() if v is not None}
+    limit = max(minutes, key=minutes.get) if minutes else None
+    return {
+        "model": model,
+        "requests": requests,
+        "input_tokens": total_input,
+        "output_tokens": round(total_output),
+        "cost_usd": cost,
+        "duration_minutes": minutes[limit] if limit else None,
+        "limited_by": limit,
+    }
+
+
+def pack_windows(
+    token_counts: Dict[str, int],
+    input_tpm: int,
+    rpm: Optional[int] = None,
+    output_tokens_per_request: float = 0.0,
+    output_tpm: Optional[int] = None,
+) -> List[List[str]]:
+    """
+    Orders requests into one-minute windows that each fit within the rate limits, using
+    best-fit decreasing bin packing. This keeps the number of windows (and so the
+    duration of the run) close to the minimum when request sizes vary a lot.
+
+    Output tokens are only known in expectation, so the output limit is applied as a cap
+    on the number of requests per window, together with `rpm`. A request that exceeds
+    `input_tpm` or `output_tpm` on its own gets a window to itself.
+
+    Args:
+        token_counts (Dict[str, int]): Input tokens per instance ID.
+        input_tpm (int): Input tokens per minute limit.
+        rpm (Optional[int]): Requests per minute limit.
+        output_tokens_per_request (float): Expected output tokens of each request.
+        output_tpm (Optional[int]): Output tokens per minute limit.
+
+    Returns:
+        List[List[str]]: The instance IDs to send in each window, in order.
+    """
+    max_requests = rpm
+    if output_tpm and output_tokens_per_request > 0:
+        output_cap = max(int(output_tpm // output_tokens_per_request), 1)
+        max_requests = output_cap if rpm is None else min(rpm, output_cap)
+
+    windows: List[List[str]] = []
+    # (remaining tokens, window index) for the windows that can take more requests
+    free: List[Tuple[int, int]] = []
+    for instance_id in sorted(token_counts, key=token_counts.get, reverse=True):
+        tokens = token_counts[instance_id]
+        pos = bisect.bisect_left(free, (tokens, -1))
+        if pos < len(free):
+            remaining, i = free.pop(pos)
+            windows[i].append(instance_id)
+            remaining -= tokens
+        else:
+            i = len(windows)
+            windows.append([instance_id])
+            remaining = input_tpm - tokens
+        if max_requests is None or len(windows[i]) < max_requests:
+            bisect.insort(free, (remaining, i))
+    return windows
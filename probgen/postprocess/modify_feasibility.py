@@ -0,0 +1,47 @@
+import random
+
+from pathlib import Path
+from scify_formats.formats import GoldStandard
+from typing import Optional
+
+from probgen.utils import iter_jsonl
+
+SEED = 14607
+random.seed(SEED)  # Set a seed for reproducibility
+
+
+def postprocess(
+    input_file: Path,
+    output_dir: Path,
+    problem_id_prefix: str,
+    subdomain: str,
+    domain: str = "materials",
+    author: str = "JHU",
+    comment: Optional[str] = None,
+) -> None:
+    for item in iter_jsonl(input_file):
+        # shuffle to ensure problem number doesn't
+        # correlate with feasibility score
+        responses = item["response"]
+        random.shuffle(responses)
+        for i, r in enumerate(responses):
+            problem_id = f"{problem_id_prefix}-{i + 1}"
+            gs = GoldStandard(
+                type="gold standard",
+                format_version="1.0",
+                problem_id=problem_id,
+                problem_version="1.0",
+                domain=domain,
+                subdomain=subdomain,
+                claim=r["claim"],
+                artifacts=[],  # no artifacts supported for now
+                likert_score=r["likert_score"],
+                explanation=r["explanation"],
+                evidence={},  # no evidence supported for now
+                author=author,
+                comments=[comment] if comment else [],
+            )
+            with open(
+                output_dir / f"{problem_id}.jsonl", "w", encoding="utf-8"
+            ) as out_file:
+                out_file.write(gs.model_dump_json() + "\n")
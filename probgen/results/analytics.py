@@ -0,0 +1,151 @@
+from typing import Dict, Tuple
+
+import numpy as np
+
+from probgen.constants import FEASIBILITY_SCORE_DEFINITIONS
+
+SCORES = np.array(sorted(FEASIBILITY_SCORE_DEFINITIONS))
+NUM_SCORES = len(SCORES)
+MIN_SCORE = SCORES[0]
+MAX_SCORE = SCORES[-1]
+# |expected - observed| for every cell of a confusion matrix
+SCORE_DISTANCES = np.abs(SCORES[:, None] - SCORES[None, :])
+
+
+def is_valid_score(scores: np.ndarray) -> np.ndarray:
+    """
+    Returns a mask of the scores that are within the feasibility scale. This excludes
+    missing scores as well as out-of-range scores returned by a model.
+    """
+    return (scores >= MIN_SCORE) & (scores <= MAX_SCORE)
+
+
+def grouped_confusion_matrices(
+    groups: np.ndarray, expected: np.ndarray, observed: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Computes one confusion matrix per group in a single pass.
+
+    Pairs where either score is missing or invalid are ignored.
+
+    Args:
+        groups (np.ndarray): Group label of each row (e.g. the subdomain).
+        expected (np.ndarray): Expected score of each row (e.g. the target score).
+        observed (np.ndarray): Observed score of each row (e.g. the verified score).
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sorted group labels and an array of shape
+            (num_groups, NUM_SCORES, NUM_SCORES) whose [g, i, j] entry counts the rows of
+            group g with expected score SCORES[i] and observed score SCORES[j].
+    """
+    labels, group_idx = np.unique(groups, return_inverse=True)
+    valid = is_valid_score(expected) & is_valid_score(observed)
+    flat_idx = (
+        group_idx[valid] * NUM_SCORES**2
+        + (expected[valid].astype(np.intp) - MIN_SCORE) * NUM_SCORES
+        + (observed[valid].astype(np.intp) - MIN_SCORE)
+    )
+    counts = np.bincount(flat_idx, minlength=len(labels) * NUM_SCORES**2)
+    return labels, counts.reshape(len(labels), NUM_SCORES, NUM_SCORES)
+
+
+def confusion_matrix(expected: np.ndarray, observed: np.ndarray) -> np.ndarray:
+    """
+    Computes the confusion matrix between expected and observed scores.
+
+    Returns:
+        np.ndarray: An array of shape (NUM_SCORES, NUM_SCORES) whose [i, j] entry counts the
+            rows with expected score SCORES[i] and observed score SCORES[j].
+    """
+    valid = is_valid_score(expected) & is_valid_score(observed)
+    flat_idx = (expected[valid].astype(np.intp) - MIN_SCORE) * NUM_SCORES + (
+        observed[valid].astype(np.intp) - MIN_SCORE
+    )
+    counts = np.bincount(flat_idx, minlength=NUM_SCORES**2)
+    return counts.reshape(NUM_SCORES, NUM_SCORES)
+
+
+def agreement_stats(matrices: np.ndarray) -> Dict[str, np.ndarray]:
+    """
+    Computes agreement statistics from one or more confusion matrices.
+
+    Args:
+        matrices (np.ndarray): A confusion matrix, or a stack of them.
+
+    Returns:
+        Dict[str, np.ndarray]: The number of scored pairs ("n"), the fraction of exact
+            matches ("agreement") and the fraction of pairs at most one point apart
+            ("within_one"). Rates are NaN where there are no scored pairs.
+    """
+    n = matrices.sum(axis=(-2, -1))
+    exact = (matrices * (SCORE_DISTANCES == 0)).sum(axis=(-2, -1))
+    within_one = (matrices * (SCORE_DISTANCES <= 1)).sum(axis=(-2, -1))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return {
+            "n": n,
+            "agreement": exact / n,
+            "within_one": within_one / n,
+        }
+
+
+def agreement_by(
+    table: Dict[str, np.ndarray],
+    by: str,
+    expected: str = "target_score",
+    observed: str = "verified_score",
+) -> Dict[str, Dict[str, float]]:
+    """
+    Computes agreement statistics between two score columns for each value of another column.
+
+    Args:
+        table (Dict[str, np.ndarray]): A results table (see probgen.results.export).
+        by (str): Column to group by (e.g. "subdomain" or "verifier_model").
+        expected (str): Column with the expected scores. Defaults to "target_score".
+        observed (str): Column with the observed scores. Defaults to "verified_score".
+
+    Returns:
+        Dict[str, Dict[str, float]]: Agreement statistics (see `agreement_stats`) per group.
+    """
+    labels, matrices = grouped_confusion_matrices(
+        table[by], table[expected], table[observed]
+    )
+    stats = agreement_stats(matrices)
+    return {
+        str(label): {k: v[i].item() for k, v in stats.items()}
+        for i, label in enumerate(labels)
+    }
+
+
+def score_distribution_by(
+    table: Dict[str, np.ndarray], by: str, column: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Counts the values of a score column for each value of another column.
+
+    Returns:
+        Tuple[np.ndarray, np.ndarray]: The sorted group labels and an array of shape
+            (num_groups, NUM_SCORES) whose [g, i] entry counts the rows of group g with
+            score SCORES[i]. Missing and invalid scores are not counted.
+    """
+    labels, group_idx = np.unique(table[by], return_inverse=True)
+    scores = table[column]
+    valid = is_valid_score(scores)
+    flat_idx = group_idx[valid] * NUM_SCORES + (
+        scores[valid].astype(np.intp) - MIN_SCORE
+    )
+    counts = np.bincount(flat_idx, minlength=len(labels) * NUM_SCORES)
+    return labels, counts.reshape(len(labels), NUM_SCORES)
+
+
+def format_confusion_matrix(matrix: np.ndarray) -> str:
+    """
+    Formats a confusion matrix as a table with expected scores as rows and observed
+    scores as columns.
+    """
+    width = max(len(str(matrix.max())), len(str(MIN_SCORE)))
+    header = " " * width + " | " + " ".join(f"{s:>{width}}" for s in SCORES)
+    rows = [
+        f"{s:>{width}} | " + " ".join(f"{c:>{width}}" for c in row)
+        for s, row in zip(SCORES, matrix)
+    ]
+    return "\n".join([header, "-" * len(header)] + rows)
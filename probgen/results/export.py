@@ -0,0 +1,223 @@
+import json
+import re
+
+from collections import defaultdict
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from probgen.constants import FEASIBILITY_SCORE_DEFINITIONS
+from probgen.utils import iter_jsonl, list_jsonl_files, source_id_from_instance_id
+
+# Sentinel for scores that are not available (e.g. unverified problems)
+MISSING_SCORE = -128
+# Sentinel for scores a model returned that are not on the feasibility scale
+INVALID_SCORE = 127
+SCORE_DTYPE = np.int8
+# Model of a record that does not say which model produced it
+UNKNOWN_MODEL = "unknown"
+# Model of a record that does not exist (e.g. the verifier of an unverified problem)
+NO_MODEL = ""
+
+STRING_COLUMNS = (
+    "instance_id",
+    "source_id",
+    "subdomain",
+    "generator_model",
+    "verifier_model",
+)
+SCORE_COLUMNS = ("source_score", "target_score", "verified_score")
+COLUMNS = STRING_COLUMNS + SCORE_COLUMNS
+TABLE_SUFFIXES = (".parquet", ".npz")
+
+LIKERT_SCORE_PATTERN = re.compile(r'"likert_score"\s*:\s*"?(-?\d+)')
+
+
+def parse_likert_score(response: Any) -> Optional[int]:
+    """
+    Extracts the likert score from a model response.
+
+    Args:
+        response (Any): The response, either already parsed or as the raw model output
+            (which may be wrapped in a Markdown code block).
+
+    Returns:
+        Optional[int]: The likert score, None if it could not be found, or INVALID_SCORE
+            if it is not one of the feasibility scores.
+    """
+    if isinstance(response, dict):
+        score = response.get("likert_score")
+        if score is None:
+            return None
+        if isinstance(score, bool):
+            return INVALID_SCORE
+        try:
+            score = float(score)
+        except (TypeError, ValueError):
+            return INVALID_SCORE
+        if not score.is_integer() or int(score) not in FEASIBILITY_SCORE_DEFINITIONS:
+            return INVALID_SCORE
+        return int(score)
+    if not isinstance(response, str):
+        return None
+    text = response.strip()
+    if text.startswith("```"):
+        text = text.strip("`").removeprefix("json").strip()
+    try:
+        return parse_likert_score(json.loads(text))
+    except (json.JSONDecodeError, ValueError):
+        match = LIKERT_SCORE_PATTERN.search(text)
+        return parse_likert_score({"likert_score": match.group(1)}) if match else None
+
+
+def flatten_results(
+    raw_path: Optional[Path] = None,
+    processed_path: Optional[Path] = None,
+    verification_paths: Sequence[Path] = (),
+) -> Dict[str, np.ndarray]:
+    """
+    Flattens generation, postprocessed and verification records into a columnar table.
+
+    The table has one row per modified problem and verifier model (or a single row with a
+    missing verified score and an empty verifier model if the problem has not been
+    verified). Verification records that do not name their model have the verifier model
+    "unknown".
+
+    Args:
+        raw_path (Optional[Path]): Raw generation output (file or directory), used for the
+            source score and the generator model.
+        processed_path (Optional[Path]): Postprocessed problems (file or directory).
+        verification_paths (Sequence[Path]): Verification output (files or directories).
+
+    Returns:
+        Dict[str, np.ndarray]: A mapping from column name to column values.
+    """
+    # source problem ID -> (source score, generator model)
+    sources = {}
+    if raw_path is not None:
+        for file in list_jsonl_files(raw_path):
+            for record in iter_jsonl(file):
+                problem = record["meta"]["problem"]
+                sources[problem["problem_id"]] = (
+                    problem["likert_score"],
+                    record["meta"].get("model", UNKNOWN_MODEL),
+                )
+
+    # modified problem ID -> (subdomain, target score)
+    problems = {}
+    if processed_path is not None:
+        for file in list_jsonl_files(processed_path):
+            for problem in iter_jsonl(file):
+                problems[problem["problem_id"]] = (
+                    problem["subdomain"],
+                    problem["likert_score"],
+                )
+
+    # modified problem ID -> [(verifier model, verified score)]
+    verifications = defaultdict(list)
+    for path in verification_paths:
+        for file in list_jsonl_files(path):
+            for record in iter_jsonl(file):
+                problem = record["meta"]["problem"]
+                problems.setdefault(
+                    record["instance_id"],
+                    (problem["subdomain"], problem["likert_score"]),
+                )
+                verifications[record["instance_id"]].append(
+                    (
+                        record["meta"].get("model", UNKNOWN_MODEL),
+                        parse_likert_score(record["response"]),
+                    )
+                )
+
+    columns = {c: [] for c in COLUMNS}
+    for instance_id, (subdomain, target_score) in sorted(problems.items()):
+        source_id = source_id_from_instance_id(instance_id)
+        source_score, generator_model = sources.get(
+            source_id, (MISSING_SCORE, NO_MODEL)
+        )
+        for verifier_model, verified_score in verifications.get(
+            instance_id, [(NO_MODEL, None)]
+        ):
+            columns["instance_id"].append(instance_id)
+            columns["source_id"].append(source_id)
+            columns["subdomain"].append(subdomain)
+            columns["generator_model"].append(generator_model)
+            columns["verifier_model"].append(verifier_model)
+            columns["source_score"].append(source_score)
+            columns["target_score"].append(target_score)
+            columns["verified_score"].append(
+                MISSING_SCORE if verified_score is None else verified_score
+            )
+    return _to_arrays(columns)
+
+
+def _check_suffix(path: Path) -> None:
+    # np.savez would silently append .npz to any other path
+    if path.suffix not in TABLE_SUFFIXES:
+        raise ValueError(
+            f"Unsupported results table {path}: must end in {' or '.join(TABLE_SUFFIXES)}."
+        )
+
+
+def _to_arrays(columns: Dict[str, List[Any]]) -> Dict[str, np.ndarray]:
+    return {
+        c: np.asarray(values, dtype=SCORE_DTYPE if c in SCORE_COLUMNS else np.str_)
+        for c, values in columns.items()
+    }
+
+
+def save_results_table(table: Dict[str, np.ndarray], path: Path) -> None:
+    """
+    Saves a results table as Parquet (if `path` ends in .parquet) or as a NumPy archive (if
+    it ends in .npz).
+
+    Missing scores are stored as nulls in Parquet. Writing Parquet requires pyarrow.
+
+    Raises:
+        ValueError: If `path` has any other suffix.
+    """
+    _check_suffix(path)
+    if path.suffix == ".parquet":
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        pq.write_table(
+            pa.table(
+                {
+                    c: (
+                        pa.array(v, mask=v == MISSING_SCORE)
+                        if c in SCORE_COLUMNS
+                        else pa.array(v.tolist(), type=pa.string())
+                    )
+                    for c, v in table.items()
+                }
+            ),
+            path,
+        )
+    else:
+        np.savez(path, **table)
+
+
+def load_results_table(path: Path) -> Dict[str, np.ndarray]:
+    """
+    Loads a results table written by `save_results_table`.
+    """
+    _check_suffix(path)
+    if path.suffix == ".parquet":
+        import pyarrow.parquet as pq
+
+        pa_table = pq.read_table(path, columns=list(COLUMNS))
+        return _to_arrays(
+            {
+                c: (
+                    pa_table[c].fill_null(MISSING_SCORE).to_numpy()
+                    if c in SCORE_COLUMNS
+                    else pa_table[c].to_pylist()
+                )
+                for c in COLUMNS
+            }
+        )
+    with np.load(path) as npz:
+        return {c: npz[c] for c in COLUMNS}
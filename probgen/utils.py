@@ -1,8 +1,13 @@
 import json
+import os
 
-from glob import glob
+from glob import escape as glob_escape, glob
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Set, Tuple
+
+# Prompt files and OpenAI results are written with the instance ID as the first key,
+# which lets it be read without parsing the (potentially large) record.
+INSTANCE_ID_PREFIX = b'{"instance_id": "'
 
 
 def load_gold_standard_problem_from_file(
@@ -70,3 +75,210 @@ def load_gold_standard_problems(
         return load_gold_standard_problems_from_dir(problems_path, jsonl=jsonl)
     else:
         raise ValueError(f"Invalid path: {problems_path}. Must be a file or directory.")
+
+
+def write_prompts(
+    prompts: List[Dict[str, Any]], output_root: Path, subdomain: str
+) -> None:
+    """
+    Write each prompt to its own JSONL file under `output_root/subdomain`.
+
+    Args:
+        prompts (List[Dict[str, Any]]): Prompts as returned by the construct_* functions.
+        output_root (Path): Root directory for the prompt files.
+        subdomain (str): Subdomain of the problems the prompts were built from.
+    """
+    for p in prompts:
+        problem_id = p["meta"]["problem"]["problem_id"]
+        output_path = output_root / subdomain / f"{problem_id}.jsonl"
+        os.makedirs(output_path.parent, exist_ok=True)
+        with open(output_path, "w") as f:
+            f.write(json.dumps(p) + "\n")
+
+
+def iter_prompts(
+    prompt_files: List[Path], skip_ids: Optional[Set[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the prompts in one or more JSONL files without loading them all at once.
+
+    Each prompt is expected to have the following keys:
+    - instance_id: a unique identifier for each example
+    - user_prompt: a user prompt to be supplied to the model
+    - system_prompt: a system prompt to be supplied to the model
+    - meta (optional): optional metadata
+
+    Args:
+        prompt_files (List[Path]): Paths to the JSONL files containing the prompts.
+        skip_ids (Optional[Set[str]]): Instance IDs of prompts to skip (e.g. because they
+            already have a response).
+
+    Yields:
+        dict: Each prompt whose instance ID is not in `skip_ids`.
+    """
+    for prompt_file in prompt_files:
+        for prompt in iter_jsonl(prompt_file):
+            if skip_ids is None or prompt["instance_id"] not in skip_ids:
+                yield prompt
+
+
+def count_lines(paths: List[Path], chunk_size: int = 1 << 20) -> int:
+    """
+    Count the records in one or more JSONL files without parsing them.
+
+    Args:
+        paths (List[Path]): Paths to the JSONL files.
+        chunk_size (int): Number of bytes to read at a time.
+
+    Returns:
+        int: The number of lines, counting a final line without a trailing newline.
+    """
+    count = 0
+    for path in paths:
+        last = b"\n"
+        with open(path, "rb") as f:
+            while chunk := f.read(chunk_size):
+                count += chunk.count(b"\n")
+                last = chunk[-1:]
+        if last != b"\n":
+            count += 1
+    return count
+
+
+def count_unseen_lines(paths: List[Path], seen_ids: Set[str]) -> Tuple[int, int]:
+    """
+    Count the records in one or more JSONL files, and how many of them have an instance ID
+    in `seen_ids`, in one pass and without parsing records that start with their ID.
+
+    Args:
+        paths (List[Path]): Paths to the JSONL files.
+        seen_ids (Set[str]): Instance IDs to count separately.
+
+    Returns:
+        tuple: The number of records whose instance ID is not in `seen_ids`, and the
+            number whose ID is.
+    """
+    unseen = 0
+    seen = 0
+    for path in paths:
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                if instance_id_of_line(line) in seen_ids:
+                    seen += 1
+                else:
+                    unseen += 1
+    return unseen, seen
+
+
+def expand_jsonl_paths(patterns: List[str]) -> List[Path]:
+    """
+    Expand files, directories and glob patterns into a list of JSONL files.
+
+    Args:
+        patterns (List[str]): JSONL files, directories containing JSONL files, or glob
+            patterns matching either.
+
+    Returns:
+        list: The matching JSONL files, in the order given (sorted within each pattern).
+    """
+    paths = []
+    for pattern in patterns:
+        if glob_escape(pattern) != pattern:
+            matches = sorted(glob(pattern, recursive=True))
+            if not matches:
+                raise ValueError(f"No files match {pattern}.")
+        else:
+            matches = [pattern]
+        for match in matches:
+            paths.extend(list_jsonl_files(Path(match)))
+    return paths
+
+
+def load_seen_instance_ids(output_file: Path) -> Set[str]:
+    """
+    Load the instance IDs of the examples already present in an output file.
+
+    Args:
+        output_file (Path): Path to the JSONL file containing model responses.
+
+    Returns:
+        set: The instance IDs found in the file (empty if the file does not exist).
+    """
+    if not os.path.exists(output_file):
+        return set()
+    return {instance_id_of(record) for record in iter_jsonl(output_file)}
+
+
+def iter_jsonl(path: Path) -> Iterator[Dict[str, Any]]:
+    """
+    Iterate over the records of a JSONL file, skipping blank lines.
+
+    Args:
+        path (Path): Path to the JSONL file.
+
+    Yields:
+        dict: Each record in the file.
+    """
+    with open(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def list_jsonl_files(path: Path) -> List[Path]:
+    """
+    List the JSONL files at a path.
+
+    Args:
+        path (Path): A JSONL file or a directory containing JSONL files.
+
+    Returns:
+        list: The path itself if it is a file, otherwise the sorted JSONL files in the directory.
+
+    Raises:
+        ValueError: If the path does not exist or is a directory without JSONL files.
+    """
+    if path.is_file():
+        return [path]
+    elif path.is_dir():
+        files = sorted(path.glob("*.jsonl"))
+        if not files:
+            raise ValueError(f"No JSONL files in {path}.")
+        return files
+    else:
+        raise ValueError(f"Invalid path: {path}. Must be a file or directory.")
+
+
+def source_id_from_instance_id(instance_id: str) -> str:
+    """
+    Returns the ID of the gold standard problem a modified problem was generated from
+    (e.g. "alloys_0001-3" -> "alloys_0001").
+    """
+    return instance_id.rsplit("-", 1)[0]
+
+
+def instance_id_of_line(line: bytes) -> str:
+    """
+    Returns the instance ID of an unparsed JSONL record, parsing it only if it does not
+    start with its instance ID.
+    """
+    if line.startswith(INSTANCE_ID_PREFIX):
+        end = line.find(b'"', len(INSTANCE_ID_PREFIX))
+        instance_id = line[len(INSTANCE_ID_PREFIX) : end]
+        if b"\\" not in instance_id:
+            return instance_id.decode("utf-8")
+    return instance_id_of(json.loads(line))
+
+
+def instance_id_of(record: Dict[str, Any]) -> str:
+    """
+    Returns the instance ID of a prompt or response record.
+
+    Records written by the Anthropic client have no top-level instance ID, so the ID of
+    the problem they were generated from is used instead.
+    """
+    if "instance_id" in record:
+        return record["instance_id"]
+    return record["meta"]["problem"]["problem_id"]
@@ -0,0 +1,79 @@
+"""
+Checks that the probgen CLI does not import heavy dependencies at startup and
+reports how long `python -m probgen --help` takes.
+
+Exits with a non-zero status if a heavy module is imported or if the median
+startup time exceeds --max-seconds.
+"""
+
+import argparse
+import statistics
+import subprocess
+import sys
+import time
+
+HEAVY_MODULES = [
+    "anthropic",
+    "aiohttp",
+    "tenacity",
+    "tqdm",
+    "numpy",
+    "pyarrow",
+    "tiktoken",
+    "scify_formats",
+    "pydantic",
+]
+
+CHECK_IMPORTS = f"""
+import sys
+from probgen.cli import build_parser
+build_parser()
+loaded = sorted({{m.split(".")[0] for m in sys.modules}} & set({HEAVY_MODULES!r}))
+print(",".join(loaded))
+"""
+
+
+def main(runs: int, max_seconds: float) -> int:
+    # Run in a fresh interpreter so that nothing imported here leaks into the check
+    loaded = subprocess.run(
+        [sys.executable, "-c", CHECK_IMPORTS],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.strip()
+    if loaded:
+        print(f"probgen.cli imports heavy modules at startup: {loaded}")
+        return 1
+
+    timings = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        subprocess.run(
+            [sys.executable, "-m", "probgen", "--help"],
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        timings.append(time.perf_counter() - start)
+    median = statistics.median(timings)
+    print(f"`python -m probgen --help`: median {median * 1000:.0f} ms over {runs} runs")
+    if median > max_seconds:
+        print(f"Startup exceeds {max_seconds} s.")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Check the import time of the probgen CLI."
+    )
+    parser.add_argument(
+        "--runs", type=int, default=10, help="Number of timed runs (default: 10)"
+    )
+    parser.add_argument(
+        "--max-seconds",
+        type=float,
+        default=0.5,
+        help="Maximum median startup time in seconds (default: 0.5)",
+    )
+    args = parser.parse_args()
+    sys.exit(main(args.runs, args.max_seconds))